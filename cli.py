@@ -1,11 +1,17 @@
 import argparse
 import csv
+import itertools
 import sys
-from typing import List
+from typing import Iterable
 
-from papers_fetcher.fetcher import fetch_pubmed_ids, fetch_and_parse_paper_details, PaperInfo
+from papers_fetcher.fetcher import (
+    fetch_pubmed_ids, iter_paper_details, search_pubmed_history, iter_paper_details_from_history,
+    clear_affiliation_cache, clear_cache, PaperInfo, PaperFetchError
+)
 
-def write_csv(papers: List[PaperInfo], filename: str) -> bool: # <-- CHANGE: Return type is now bool
+CSV_WRITE_BUFFER_SIZE = 1 << 20
+
+def write_csv(papers: Iterable[PaperInfo], filename: str) -> bool: # <-- CHANGE: Return type is now bool
     csv_headers = [
         "PubmedID",
         "Title",
@@ -16,19 +22,26 @@ def write_csv(papers: List[PaperInfo], filename: str) -> bool: # <-- CHANGE: Ret
     ]
 
     try:
-        with open(filename, mode='w', newline='', encoding='utf-8') as csvfile:
+        # A 1 MiB buffer keeps the number of write() syscalls low for large result sets
+        with open(filename, mode='w', newline='', encoding='utf-8', buffering=CSV_WRITE_BUFFER_SIZE) as csvfile:
             writer = csv.writer(csvfile)
             writer.writerow(csv_headers)
-            for p in papers:
-                writer.writerow([
+            # Hand all rows to the C writer in one call; the generator avoids building an intermediate list
+            writer.writerows(
+                [
                     p.pubmed_id,
                     p.title,
                     p.publication_date,
                     "; ".join(p.non_academic_authors),
                     "; ".join(p.company_affiliations),
                     p.corresponding_email if p.corresponding_email else ""
-                ])
+                ]
+                for p in papers
+            )
         return True # <-- ADD THIS LINE: Indicates success
+    except PaperFetchError:
+        # A failed fetch isn't a CSV problem; let main() report it
+        raise
     except IOError as e:
         print(f"Error: Could not write to file '{filename}'. Reason: {e}", file=sys.stderr)
         return False # <-- ADD THIS LINE: Indicates failure
@@ -37,13 +50,12 @@ def write_csv(papers: List[PaperInfo], filename: str) -> bool: # <-- CHANGE: Ret
         return False # <-- ADD THIS LINE: Indicates failure
 
 
-def print_to_console(papers: List[PaperInfo]) -> None:
-    if not papers:
-        print("No papers found matching the criteria.")
-        return
+def print_to_console(papers: Iterable[PaperInfo]) -> None:
+    printed_any = False
 
   # Iterate through each paper and print its details
     for p in papers:
+        printed_any = True
         print(f"PubmedID: {p.pubmed_id}")
         print(f"Title: {p.title}")
         print(f"Publication Date: {p.publication_date}")
@@ -52,6 +64,9 @@ def print_to_console(papers: List[PaperInfo]) -> None:
         print(f"Corresponding Author Email: {p.corresponding_email if p.corresponding_email else 'N/A'}")
         print("-" * 80)
 
+    if not printed_any:
+        print("No papers found matching the criteria.")
+
 
 def main() -> None:
     parser = argparse.ArgumentParser(
@@ -89,6 +104,21 @@ def main() -> None:
         help="Specify the filename to save the results as a CSV file. If not provided, output will be printed to the console."
     )
     
+    # Define an optional flag for bypassing cached PubMed responses
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Clear the local cache of PubMed responses so results are fetched fresh from NCBI."
+    )
+
+    # Define an optional flag for paging results through NCBI's history server
+    parser.add_argument(
+        "--use-history",
+        action="store_true",
+        help="Keep the search results on NCBI's history server (WebEnv) and page through them,\n"
+             "instead of downloading the PubMed IDs and sending them back. These requests are not cached."
+    )
+
     # Parse the command-line arguments provided by the user
     args = parser.parse_args()
     
@@ -98,21 +128,35 @@ def main() -> None:
         print(f"[DEBUG] Using email: '{args.email}'", file=sys.stderr)
 
     try:
-        # Fetch PubMed IDs based on the query
-        pubmed_ids = fetch_pubmed_ids(args.query, debug=args.debug)
-        if not pubmed_ids:
-            print(f"No PubMed IDs found for query: '{args.query}'", file=sys.stderr)
-            sys.exit(1)
-
-         # Fetch detailed paper information and filter for non-academic authors
-        papers = fetch_and_parse_paper_details(pubmed_ids, debug=args.debug)
-
-        if not papers:
+        if args.no_cache:
+            clear_cache()
+
+        if args.use_history:
+            # Run the search on NCBI's history server and page through the stored results
+            history = search_pubmed_history(args.query, debug=args.debug, email=args.email)
+            if history is None or not history.count:
+                print(f"No PubMed IDs found for query: '{args.query}'", file=sys.stderr)
+                sys.exit(1)
+            papers = iter_paper_details_from_history(history, debug=args.debug, email=args.email)
+        else:
+            # Fetch PubMed IDs based on the query
+            pubmed_ids = fetch_pubmed_ids(args.query, debug=args.debug, email=args.email)
+            if not pubmed_ids:
+                print(f"No PubMed IDs found for query: '{args.query}'", file=sys.stderr)
+                sys.exit(1)
+
+            # Stream detailed paper information, filtered for non-academic authors, straight to the output
+            papers = iter_paper_details(pubmed_ids, debug=args.debug, email=args.email)
+
+        # Peek at the first paper so an empty result can still be reported up front
+        first_paper = next(papers, None)
+        if first_paper is None:
             print("No papers found with non-academic (pharma/biotech) affiliations matching the criteria.", file=sys.stderr)
             sys.exit(0)
+        papers = itertools.chain([first_paper], papers)
 
          # Handle output based on whether a file was specified
-       if args.file:
+        if args.file:
             # Checks the return value of write_csv to know if it truly succeeded
             if write_csv(papers, args.file): # Now checking the boolean return
                 print(f"Results successfully saved to '{args.file}'")
@@ -122,9 +166,16 @@ def main() -> None:
         else:
             print_to_console(papers)
 
+    except PaperFetchError as e:
+        # Some papers could not be fetched, so any output written above is incomplete
+        print(f"{e}. Results are incomplete.", file=sys.stderr)
+        sys.exit(1)
     except Exception as e:
         print(f"An error occurred during execution: {e}", file=sys.stderr)
         sys.exit(1)
+    finally:
+        # Release the memoized affiliation classifications built up during this run
+        clear_affiliation_cache()
 
 if __name__ == "__main__":
     main()
@@ -1,13 +1,167 @@
-from typing import List, Optional
+from typing import BinaryIO, Callable, FrozenSet, Iterator, List, Optional, Tuple
+import io
+import os
+import threading
+from urllib.parse import parse_qs, urlsplit
+from concurrent.futures import ThreadPoolExecutor
 import requests
-import xml.etree.ElementTree as ET
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import re
+import functools
 from dataclasses import dataclass
+from lxml import etree
+
+# requests-cache is optional; without it every run goes to the network
+try:
+    import requests_cache
+    _HAS_REQUESTS_CACHE = True
+except ImportError:
+    _HAS_REQUESTS_CACHE = False
 
 #--- Constants for API and Heuristics---
 PUBMED_ESEARCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
 PUBMED_EFETCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
-RETMAX_PAPERS = "200"
+RETMAX_PAPERS = "10000"
+EFETCH_CHUNK_SIZE = 200
+
+# On-disk cache of E-utilities responses, kept under the user's cache directory and reused across runs for a day
+RESPONSE_CACHE_NAME = "papers-fetcher/pubmed_cache.sqlite"
+RESPONSE_CACHE_EXPIRE_SECONDS = 86400
+
+# Identification sent with every E-utilities request
+NCBI_TOOL_NAME = "papers-fetcher"
+NCBI_TOOL_VERSION = "0.1.0"
+NCBI_API_KEY = os.environ.get("NCBI_API_KEY")
+
+# NCBI allows 3 requests/second without an API key and 10 with one
+NCBI_REQUESTS_PER_SECOND = 3
+NCBI_REQUESTS_PER_SECOND_WITH_KEY = 10
+
+
+# Sliding-window limiter: at most `rate` requests may start in any period
+class _RateLimiter:
+    def __init__(self, rate: int, period: float = 1.0):
+        self.rate = rate
+        self._semaphore = threading.Semaphore(rate)
+        self._period = period
+
+    def acquire(self) -> None:
+        self._semaphore.acquire()
+        # Hand the permit back once the window has passed
+        timer = threading.Timer(self._period, self._semaphore.release)
+        timer.daemon = True
+        timer.start()
+
+
+_RATE_LIMITER = _RateLimiter(NCBI_REQUESTS_PER_SECOND)
+_API_KEY_RATE_LIMITER = _RateLimiter(NCBI_REQUESTS_PER_SECOND_WITH_KEY)
+
+
+def _rate_limiter_for(api_key: Optional[str]) -> _RateLimiter:
+    return _API_KEY_RATE_LIMITER if api_key else _RATE_LIMITER
+
+
+# Limiter of the request the current thread is sending, for retries made inside HTTPAdapter.send
+_REQUEST_LIMITER = threading.local()
+
+
+# urllib3 re-sends retried requests itself, below the adapter, so each retry waits for its own permit
+# once the backoff is over (the first retry has no backoff and would otherwise go out unthrottled)
+class _RateLimitedRetry(Retry):
+    def sleep(self, response=None) -> None:
+        super().sleep(response)
+        limiter = getattr(_REQUEST_LIMITER, "limiter", None)
+        if limiter is not None:
+            limiter.acquire()
+
+
+# Transport adapter that waits on the rate limiter before each request actually sent to NCBI.
+# Responses served from the cache never reach the adapter, so they don't use up the budget
+class _RateLimitedAdapter(HTTPAdapter):
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        body = request.body.decode() if isinstance(request.body, bytes) else (request.body or "")
+        has_api_key = "api_key" in parse_qs(urlsplit(request.url).query) or "api_key" in parse_qs(body)
+        limiter = _API_KEY_RATE_LIMITER if has_api_key else _RATE_LIMITER
+        limiter.acquire()
+        _REQUEST_LIMITER.limiter = limiter
+        try:
+            return super().send(request, **kwargs)
+        finally:
+            _REQUEST_LIMITER.limiter = None
+
+
+def _configure_session(session: requests.Session) -> requests.Session:
+    # Pool keep-alive connections and retry transient NCBI failures (including 429 rate limiting) with backoff
+    session.mount("https://", _RateLimitedAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        max_retries=_RateLimitedRetry(
+            total=5,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET", "POST"],
+        ),
+    ))
+    # Ask for compressed XML explicitly; requests decompresses it transparently
+    session.headers.update({
+        "Accept-Encoding": "gzip, deflate",
+        "User-Agent": f"{NCBI_TOOL_NAME}/{NCBI_TOOL_VERSION}",
+    })
+    return session
+
+
+# Shared HTTP session so E-utilities calls reuse pooled keep-alive connections.
+# It is created on first use, so importing the module doesn't open (or create) the on-disk cache
+_SESSION: Optional[requests.Session] = None
+_SESSION_LOCK = threading.Lock()
+
+
+def _session() -> requests.Session:
+    global _SESSION
+    if _SESSION is None:
+        with _SESSION_LOCK:
+            if _SESSION is None:
+                # Repeated ESearch/EFetch requests are answered from the cache when requests-cache is available
+                if _HAS_REQUESTS_CACHE:
+                    session = requests_cache.CachedSession(
+                        RESPONSE_CACHE_NAME,
+                        use_cache_dir=True,
+                        expire_after=RESPONSE_CACHE_EXPIRE_SECONDS,
+                        allowable_methods=("GET", "POST"),
+                    )
+                else:
+                    session = requests.Session()
+                _SESSION = _configure_session(session)
+    return _SESSION
+
+
+# History-server (WebEnv) requests are tied to one search and expire on NCBI's side, so they never
+# go through the cache; a plain session also lets their EFetch bodies stream
+_HISTORY_SESSION = _configure_session(requests.Session())
+
+
+def clear_cache() -> None:
+    # Drop every cached E-utilities response so the next calls go to NCBI
+    if _HAS_REQUESTS_CACHE:
+        _session().cache.clear()
+
+
+def _eutils_params(email: Optional[str], api_key: Optional[str]) -> dict:
+    # Common identification parameters NCBI asks every E-utilities call to carry
+    params = {"tool": NCBI_TOOL_NAME}
+    if email:
+        params["email"] = email
+    if api_key:
+        params["api_key"] = api_key
+    return params
+
+
+def _eutils_headers(email: Optional[str]) -> dict:
+    # Per-request User-Agent carrying the contact email, as NCBI asks tools to identify themselves
+    if email:
+        return {"User-Agent": f"{NCBI_TOOL_NAME}/{NCBI_TOOL_VERSION} ({email})"}
+    return {}
 
 # Heuristics for identifiying company affiliations
 # These keywords suggest a corporate/non-academic affiliation
@@ -21,6 +175,10 @@ COMPANY_KEYWORDS = [
     "astrazeneca", "johnson & johnson", "merck", "eli lilly", "sanofi"
 ]
 
+# Stems that mark a company even inside a compound word ("Biopharmaceuticals", "Immunotherapeutics"),
+# or with a non-English ending ("Pharmaceutica", "Diagnostica"), so they are matched anywhere in the text
+COMPANY_KEYWORD_STEMS = ["pharma", "biotech", "therapeutics", "diagnostic", "labs"]
+
 # These keywords suggest an academic/hospital affiliation
 ACADEMIC_KEYWORDS = [
     "university", "institute", "college", "school", "department",
@@ -28,8 +186,49 @@ ACADEMIC_KEYWORDS = [
     "public health", "federal agency", "nih", "cdc", "who", "fda", "ema"
 ]
 
+
+def _compile_keywords(keywords: List[str]) -> re.Pattern:
+    # One alternation for a list of keywords, matched as whole words (an optional plural "s" is allowed).
+    # This stops short keywords firing inside unrelated words ("ag" in "agency", "who" in "whole"),
+    # at the cost of no longer matching keywords inside compound words ("biopharmaceuticals");
+    # COMPANY_KEYWORD_STEMS covers the compound company names that matter.
+    # Lookarounds are used instead of \b because several keywords end in "." (e.g. "inc.", "co.").
+    # Callers search already-lowercased text, so no case-insensitive matching is needed
+    alternation = "|".join(map(re.escape, keywords))
+    return re.compile(r"(?<!\w)(?:" + alternation + r")s?(?!\w)")
+
+
+# Affiliations are tokenized into lowercase words ("&" is kept so "r&d" stays one token)
+_TOKEN_RE = re.compile(r"[a-z&]+")
+
+
+def _split_keywords(keywords: List[str]) -> Tuple[FrozenSet[str], re.Pattern]:
+    # Single-token keywords are looked up in a frozenset of the affiliation's words;
+    # punctuated or multi-word keywords (e.g. "inc.", "eli lilly") still need the regex
+    words = frozenset(k for k in keywords if _TOKEN_RE.fullmatch(k))
+    phrases = [k for k in keywords if k not in words]
+    return words, _compile_keywords(phrases)
+
+
+_COMPANY_WORDS, _COMPANY_PHRASE_RE = _split_keywords(COMPANY_KEYWORDS)
+_COMPANY_STEM_RE = re.compile("|".join(map(re.escape, COMPANY_KEYWORD_STEMS)))
+_ACADEMIC_WORDS, _ACADEMIC_PHRASE_RE = _split_keywords(ACADEMIC_KEYWORDS)
+_EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+
+
+# Compiled XPath objects (_XP_*) are called with the element to search
+_XP_PUBDATE = etree.XPath("./MedlineCitation/Article/Journal/JournalIssue/PubDate")
+_XP_AUTHOR_LIST = etree.XPath("./MedlineCitation/Article/AuthorList")
+
+# Plain path strings (_PATH_*) are passed to findtext/find/findall, which keep findtext's
+# semantics of returning only the element's own text
+_PATH_PMID = "./MedlineCitation/PMID"
+_PATH_TITLE = "./MedlineCitation/Article/ArticleTitle"
+_PATH_AUTHOR = "Author"
+_PATH_AFFILIATION = "Affiliation"
+
 # --- Data Structure for Paper Information ---
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PaperInfo:
     pubmed_id: str
     title: str
@@ -38,144 +237,338 @@ class PaperInfo:
     company_affiliations: List[str]
     corresponding_email: Optional[str]
 
+
+# --- Handle to a result set stored on NCBI's history server ---
+@dataclass(slots=True, frozen=True)
+class SearchHistory:
+    webenv: str
+    query_key: str
+    count: int
+
+
+# Raised when a chunk of paper details can't be fetched or parsed, so callers don't mistake
+# the papers yielded so far for the complete result set
+class PaperFetchError(Exception):
+    pass
+
 # --- Utility Functions ---
 def is_corporate_affiliation(affiliation: str) -> bool:
-    affiliation_lower = affiliation.lower()
+    # Lowercase before the cache lookup so differently-cased copies of an affiliation share one entry
+    return _is_corporate_affiliation_lower(affiliation.lower())
 
-    has_company_keyword = any(word in affiliation_lower for word in COMPANY_KEYWORDS)
-    has_academic_keyword = any(word in affiliation_lower for word in ACADEMIC_KEYWORDS)
 
-    if has_company_keyword and not has_academic_keyword:
-        return True
-    
-    return False
+def clear_affiliation_cache() -> None:
+    _is_corporate_affiliation_lower.cache_clear()
+
+
+# Affiliation strings repeat heavily across co-authors and articles, so classifications are memoized
+@functools.lru_cache(maxsize=20000)
+def _is_corporate_affiliation_lower(affiliation_lower: str) -> bool:
+    tokens = set(_TOKEN_RE.findall(affiliation_lower))
+    # Also match the singular of plural words, e.g. "pharmaceuticals" -> "pharmaceutical"
+    tokens.update([token[:-1] for token in tokens if token.endswith("s")])
+
+    # Most PubMed affiliations are academic, so rule those out before looking for company keywords
+    has_academic_keyword = (not tokens.isdisjoint(_ACADEMIC_WORDS)
+                            or _ACADEMIC_PHRASE_RE.search(affiliation_lower) is not None)
+    if has_academic_keyword:
+        return False
+
+    has_company_keyword = (not tokens.isdisjoint(_COMPANY_WORDS)
+                           or _COMPANY_STEM_RE.search(affiliation_lower) is not None
+                           or _COMPANY_PHRASE_RE.search(affiliation_lower) is not None)
+    return has_company_keyword
 
 def extract_first_email_from_text(text: str) -> Optional[str]:
-    emails = re.findall(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}", text)
-    return emails[0] if emails else None
+    match = _EMAIL_RE.search(text)
+    return match.group(0) if match else None
 
 # --- Core PubMed API Interaction Functions ---
-def fetch_pubmed_ids(query: str, debug: bool = False) -> List[str]:
+def fetch_pubmed_ids(query: str, debug: bool = False, email: Optional[str] = None,
+                     api_key: Optional[str] = NCBI_API_KEY) -> List[str]:
     # Parameters for the ESearch API call
-    params = {"db": "pubmed", "term": query, "retmax": RETMAX_PAPERS, "retmode": "xml"}
+    params = {"db": "pubmed", "term": query, "retmax": RETMAX_PAPERS, "retmode": "json"}
+    params.update(_eutils_params(email, api_key))
     try:
         # Send GET request to the ESearch API
-        resp = requests.get(PUBMED_ESEARCH_URL, params=params)
+        resp = _session().get(PUBMED_ESEARCH_URL, params=params, headers=_eutils_headers(email))
         resp.raise_for_status()
         
-        # Parse the XML response and extract all <Id> elements
-        root = ET.fromstring(resp.text)
-        ids = [id_elem.text for id_elem in root.findall("./IdList/Id") if id_elem.text]
+        # Parse the JSON response and extract the list of IDs
+        ids = resp.json().get("esearchresult", {}).get("idlist", [])
         
         if debug:
             print(f"[DEBUG] Found {len(ids)} PubMed IDs for query: '{query}'")
         return ids
     except requests.exceptions.RequestException as e:
+        # Also covers a body that isn't valid JSON (requests.exceptions.JSONDecodeError)
         print(f"Error fetching PubMed IDs: {e}")
         return []
-    except ET.ParseError as e:
-        print(f"Error parsing XML for PubMed IDs: {e}")
-        return []
 
 
-def fetch_and_parse_paper_details(pubmed_ids: List[str], debug: bool = False) -> List[PaperInfo]:
-    if not pubmed_ids:
+def search_pubmed_history(query: str, debug: bool = False, email: Optional[str] = None,
+                          api_key: Optional[str] = NCBI_API_KEY) -> Optional[SearchHistory]:
+    # ESearch with usehistory=y keeps the matching IDs on NCBI's history server and
+    # returns only a WebEnv/query_key pair (retmax=0 skips sending the ID list)
+    params = {"db": "pubmed", "term": query, "usehistory": "y", "retmax": "0", "retmode": "json"}
+    params.update(_eutils_params(email, api_key))
+    try:
+        # Send GET request to the ESearch API
+        resp = _HISTORY_SESSION.get(PUBMED_ESEARCH_URL, params=params, headers=_eutils_headers(email))
+        resp.raise_for_status()
+
+        result = resp.json().get("esearchresult", {})
+        webenv = result.get("webenv")
+        query_key = result.get("querykey")
+        if not webenv or not query_key:
+            print(f"Error fetching PubMed search history: no WebEnv returned for query: '{query}'")
+            return None
+
+        history = SearchHistory(webenv=webenv, query_key=query_key, count=int(result.get("count", 0)))
         if debug:
-            print("[DEBUG] No PubMed IDs to fetch details for.")
-        return []
+            print(f"[DEBUG] Found {history.count} PubMed IDs for query: '{query}' (WebEnv {history.webenv})")
+        return history
+    except requests.exceptions.RequestException as e:
+        # Also covers a body that isn't valid JSON (requests.exceptions.JSONDecodeError)
+        print(f"Error fetching PubMed search history: {e}")
+        return None
 
-    params = {"db": "pubmed", "id": ",".join(pubmed_ids), "retmode": "xml"}
-    
-    try:
-        # Send GET request to the EFetch API
-        resp = requests.get(PUBMED_EFETCH_URL, params=params)
+
+def _iter_articles(source: BinaryIO) -> Iterator[etree._Element]:
+    # Stream-parse so only one article subtree is held in memory at a time.
+    # Each <PubmedArticle> is yielded once fully parsed, then released along with the root's references to it
+    for _, article in etree.iterparse(source, events=("end",), tag="PubmedArticle"):
+        yield article
+        article.clear()
+        while article.getprevious() is not None:
+            del article.getparent()[0]
+
+
+def _parse_article(article: etree._Element, debug: bool = False) -> Optional[PaperInfo]:
+    # Extract PMID and Title, defaulting to 'N/A' if not found
+    findtext = article.findtext
+    pmid = findtext(_PATH_PMID) or "N/A"
+
+    # Entries without authors (editorials, corrections, ...) can never qualify, so skip them up front
+    author_lists = _XP_AUTHOR_LIST(article)
+    if not author_lists or len(author_lists[0]) == 0:
+        if debug:
+            print(f"[DEBUG] Paper {pmid}: No authors listed.")
+        return None
+
+    title = findtext(_PATH_TITLE) or "N/A"
+    # Extract publication date, handling different XML structures (Year, Month, Day, or MedlineDate)
+    pub_date = "N/A"
+    pub_date_nodes = _XP_PUBDATE(article)
+    if pub_date_nodes:
+        pub_date_node = pub_date_nodes[0]
+        pub_findtext = pub_date_node.findtext
+        year = pub_findtext("Year")
+        month = pub_findtext("Month")
+        day = pub_findtext("Day")
+        medline_date = pub_findtext("MedlineDate")
+
+        if year:
+            pub_date = f"{year}"
+            if month:
+                pub_date += f"-{month}"
+                if day:
+                    pub_date += f"-{day}"
+        elif medline_date:
+            pub_date = medline_date
+
+    # Initialize lists for authors and affiliations identified as non-academic for the current paper.
+    # The matching sets deduplicate them as they are collected while the lists keep document order
+    current_non_academic_authors: List[str] = []
+    current_company_affiliations: List[str] = []
+    seen_authors: set[str] = set()
+    seen_affiliations: set[str] = set()
+    current_corresponding_email: Optional[str] = None
+
+    # Iterate through each author in the article's AuthorList
+    for author in author_lists[0].findall(_PATH_AUTHOR):
+        # Collect the name parts and first affiliation in a single pass over the author's children
+        last_name: Optional[str] = None
+        fore_name: Optional[str] = None
+        affiliation_text: Optional[str] = None
+        for child in author:
+            tag = child.tag
+            if tag == "LastName":
+                last_name = child.text
+            elif tag == "ForeName":
+                fore_name = child.text
+            elif tag == "AffiliationInfo" and affiliation_text is None:
+                affiliation_node = child.find(_PATH_AFFILIATION)
+                if affiliation_node is not None:
+                    affiliation_text = affiliation_node.text or ""
+        if fore_name and last_name:
+            full_name = fore_name + " " + last_name
+        else:
+            full_name = last_name or fore_name or ""
+        affiliation_text = affiliation_text or ""
+
+        if is_corporate_affiliation(affiliation_text):
+            if full_name and full_name not in seen_authors:
+                seen_authors.add(full_name)
+                current_non_academic_authors.append(full_name)
+            if affiliation_text and affiliation_text not in seen_affiliations:
+                seen_affiliations.add(affiliation_text)
+                current_company_affiliations.append(affiliation_text)
+
+    # Take the first email found in the (deduplicated) corporate affiliations
+    for company_affiliation in current_company_affiliations:
+        current_corresponding_email = extract_first_email_from_text(company_affiliation)
+        if current_corresponding_email:
+            break
+
+    if current_non_academic_authors:
+        return PaperInfo(
+            pubmed_id=pmid,
+            title=title,
+            publication_date=pub_date,
+            non_academic_authors=current_non_academic_authors,
+            company_affiliations=current_company_affiliations,
+            corresponding_email=current_corresponding_email
+        )
+
+    if debug:
+        # If debug mode is on, log papers that were filtered out
+        print(f"[DEBUG] Paper {pmid}: No non-academic authors found based on heuristics.")
+    return None
+
+
+def _is_cached_session(session: requests.Session) -> bool:
+    return _HAS_REQUESTS_CACHE and isinstance(session, requests_cache.CachedSession)
+
+
+def _efetch(params: dict, debug: bool = False, email: Optional[str] = None,
+            session: Optional[requests.Session] = None) -> List[PaperInfo]:
+    # Send POST request to the EFetch API so large ID lists are not limited by URL length.
+    # With a plain session the body is streamed so parsing overlaps with the download
+    session = session or _session()
+    cached = _is_cached_session(session)
+    papers: List[PaperInfo] = []
+    with session.post(PUBMED_EFETCH_URL, data=params, headers=_eutils_headers(email), stream=not cached) as resp:
         resp.raise_for_status()
+        if cached:
+            # requests-cache reads (and decodes) the whole body to store it, leaving resp.raw's
+            # decoder in a used state; parse the buffered content instead
+            source: BinaryIO = io.BytesIO(resp.content)
+        else:
+            # Let urllib3 undo any gzip/deflate transfer encoding as the parser reads
+            resp.raw.decode_content = True
+            source = resp.raw
+
+        # Handle each <PubmedArticle> element as soon as it has been parsed
+        for article in _iter_articles(source):
+            paper = _parse_article(article, debug=debug)
+            if paper is not None:
+                papers.append(paper)
+    return papers
+
+
+def _efetch_chunk(pubmed_ids: List[str], debug: bool = False, email: Optional[str] = None,
+                  api_key: Optional[str] = None) -> List[PaperInfo]:
+    # Sort the IDs so the same set always produces the same request body (and response cache key)
+    params = {"db": "pubmed", "id": ",".join(sorted(pubmed_ids)), "retmode": "xml"}
+    params.update(_eutils_params(email, api_key))
+    papers = _efetch(params, debug=debug, email=email)
+
+    # Put the papers back in the order the IDs were given (the ESearch ranking)
+    position = {pmid: index for index, pmid in enumerate(pubmed_ids)}
+    papers.sort(key=lambda paper: position.get(paper.pubmed_id, len(position)))
+    return papers
+
+
+def _efetch_history_page(history: SearchHistory, retstart: int, retmax: int, debug: bool = False,
+                         email: Optional[str] = None, api_key: Optional[str] = None) -> List[PaperInfo]:
+    # Fetch one page of a result set stored on NCBI's history server; it comes back in ESearch order
+    params = {
+        "db": "pubmed", "WebEnv": history.webenv, "query_key": history.query_key,
+        "retstart": str(retstart), "retmax": str(retmax), "retmode": "xml",
+    }
+    params.update(_eutils_params(email, api_key))
+    return _efetch(params, debug=debug, email=email, session=_HISTORY_SESSION)
 
-         # Parse the entire XML response containing details for multiple articles
-        root = ET.fromstring(resp.text)
-        filtered_papers: List[PaperInfo] = []
-        
-        # Iterate through each <PubmedArticle> element found in the XML response
-        for article in root.findall("./PubmedArticle"):
-            # Extract PMID and Title, defaulting to 'N/A' if not found
-            pmid = article.findtext("./MedlineCitation/PMID") or "N/A"
-            title = article.findtext("./MedlineCitation/Article/ArticleTitle") or "N/A"
-            # Extract publication date, handling different XML structures (Year, Month, Day, or MedlineDate)
-            pub_date = "N/A"
-            pub_date_node = article.find("./MedlineCitation/Article/Journal/JournalIssue/PubDate")
-            if pub_date_node is not None:
-                year = pub_date_node.findtext("Year")
-                month = pub_date_node.findtext("Month")
-                day = pub_date_node.findtext("Day")
-                medline_date = pub_date_node.findtext("MedlineDate")
-
-                if year:
-                    pub_date = f"{year}"
-                    if month:
-                        pub_date += f"-{month}"
-                        if day:
-                            pub_date += f"-{day}"
-                elif medline_date:
-                    pub_date = medline_date
-                    
-            # Initialize lists for authors and affiliations identified as non-academic for the current paper
-            current_non_academic_authors: List[str] = []
-            current_company_affiliations: List[str] = []
-            current_corresponding_email: Optional[str] = None
-
-            # Iterate through each author in the article's AuthorList
-            for author in article.findall("./MedlineCitation/Article/AuthorList/Author"):
-                last_name = author.findtext("LastName")
-                fore_name = author.findtext("ForeName")
-                full_name = f"{fore_name or ''} {last_name or ''}".strip()
-
-               # Extract the affiliation text for the current author
-                affiliation_node = author.find("./AffiliationInfo/Affiliation")
-                affiliation_text = affiliation_node.text if affiliation_node is not None else ""
-
-                if is_corporate_affiliation(affiliation_text):
-                    if full_name:
-                        current_non_academic_authors.append(full_name)
-                    if affiliation_text:
-                        current_company_affiliations.append(affiliation_text)
-            
-            article_abstract_text = article.findtext("./MedlineCitation/Article/Abstract/AbstractText")
-            article_other_fields_text = (
-                article.findtext("./MedlineCitation/Article/ArticleTitle") + " " +
-                article.findtext("./MedlineCitation/Article/AuthorList/Author/AffiliationInfo/Affiliation") + " " +
-                (article_abstract_text if article_abstract_text else "")
-            ) if article.findtext("./MedlineCitation/Article/AuthorList/Author/AffiliationInfo/Affiliation") else ""
-
-            # Extract the first email found from the combined text
-            if article_other_fields_text:
-                 current_corresponding_email = extract_first_email_from_text(article_other_fields_text)
-
-            if current_non_academic_authors:
-                unique_company_affiliations = list(set(current_company_affiliations))
-                unique_non_academic_authors = list(set(current_non_academic_authors))
-
-                filtered_papers.append(PaperInfo(
-                    pubmed_id=pmid,
-                    title=title,
-                    publication_date=pub_date,
-                    non_academic_authors=unique_non_academic_authors,
-                    company_affiliations=unique_company_affiliations,
-                    corresponding_email=current_corresponding_email
-                ))
-            elif debug:
-                 # If debug mode is on, log papers that were filtered out
-                print(f"[DEBUG] Paper {pmid}: No non-academic authors found based on heuristics.")
+
+def _iter_concurrent_efetch(tasks: List[Tuple[str, Callable[[], List[PaperInfo]]]], total: int,
+                            debug: bool = False, api_key: Optional[str] = None) -> Iterator[PaperInfo]:
+    # Run the EFetch tasks concurrently, with as many workers as the rate limit lets start each second
+    max_workers = _rate_limiter_for(api_key).rate
+
+    # Label of the chunk being consumed, for error messages
+    description = f"{total} papers"
+    try:
+        filtered_count = 0
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [(label, executor.submit(task)) for label, task in tasks]
+            try:
+                # Yield results in submission order so output follows the ESearch ranking,
+                # handing each chunk's papers to the caller as soon as that chunk is done
+                for description, future in futures:
+                    for paper in future.result():
+                        filtered_count += 1
+                        yield paper
+            finally:
+                # Don't start fetching chunks nobody will consume after an error or early exit
+                for _, future in futures:
+                    future.cancel()
 
         if debug:
-            print(f"[DEBUG] Fetched details for {len(pubmed_ids)} papers. Filtered down to {len(filtered_papers)} with non-academic authors.")
-        return filtered_papers
+            print(f"[DEBUG] Fetched details for {total} papers in {len(tasks)} chunk(s). Filtered down to {filtered_count} with non-academic authors.")
     except requests.exceptions.RequestException as e:
-        print(f"Error fetching paper details: {e}")
-        return []
-    except ET.ParseError as e:
-        print(f"Error parsing XML for paper details: {e}")
-        return []
+        raise PaperFetchError(f"Error fetching paper details for {description}: {e}") from e
+    except etree.ParseError as e:
+        raise PaperFetchError(f"Error parsing XML for paper details for {description}: {e}") from e
     except Exception as e:
         # Catch any other unexpected errors during processing
-        print(f"An unexpected error occurred during detail fetching/parsing for PubMed IDs {pubmed_ids}: {e}")
+        raise PaperFetchError(f"An unexpected error occurred during detail fetching/parsing for {description}: {e}") from e
+
+
+def iter_paper_details(pubmed_ids: List[str], debug: bool = False, email: Optional[str] = None,
+                       api_key: Optional[str] = NCBI_API_KEY,
+                       chunk_size: int = EFETCH_CHUNK_SIZE) -> Iterator[PaperInfo]:
+    if not pubmed_ids:
+        if debug:
+            print("[DEBUG] No PubMed IDs to fetch details for.")
+        return
+
+    # Split the IDs into EFetch-sized chunks and fetch them concurrently.
+    # Each chunk is labelled by its first and last ID for error messages
+    chunks = [pubmed_ids[i:i + chunk_size] for i in range(0, len(pubmed_ids), chunk_size)]
+    tasks = [
+        (f"PubMed IDs {chunk[0]}..{chunk[-1]} ({len(chunk)} IDs)",
+         functools.partial(_efetch_chunk, chunk, debug, email, api_key))
+        for chunk in chunks
+    ]
+    yield from _iter_concurrent_efetch(tasks, len(pubmed_ids), debug=debug, api_key=api_key)
+
+
+def iter_paper_details_from_history(history: SearchHistory, debug: bool = False, email: Optional[str] = None,
+                                    api_key: Optional[str] = NCBI_API_KEY,
+                                    chunk_size: int = EFETCH_CHUNK_SIZE) -> Iterator[PaperInfo]:
+    total = min(history.count, int(RETMAX_PAPERS))
+    if not total:
+        if debug:
+            print("[DEBUG] No PubMed IDs to fetch details for.")
+        return
+
+    # Page through the stored result set with retstart/retmax instead of sending the IDs back
+    tasks = []
+    for retstart in range(0, total, chunk_size):
+        retmax = min(chunk_size, total - retstart)
+        tasks.append((f"WebEnv records {retstart + 1}-{retstart + retmax}",
+                      functools.partial(_efetch_history_page, history, retstart, retmax, debug, email, api_key)))
+    yield from _iter_concurrent_efetch(tasks, total, debug=debug, api_key=api_key)
+
+
+def fetch_and_parse_paper_details(pubmed_ids: List[str], debug: bool = False, email: Optional[str] = None,
+                                  api_key: Optional[str] = NCBI_API_KEY,
+                                  chunk_size: int = EFETCH_CHUNK_SIZE) -> List[PaperInfo]:
+    # Eager wrapper around iter_paper_details for callers that want the whole list; on failure
+    # nothing is returned rather than a partial list
+    try:
+        return list(iter_paper_details(pubmed_ids, debug=debug, email=email, api_key=api_key, chunk_size=chunk_size))
+    except PaperFetchError as e:
+        print(e)
         return []
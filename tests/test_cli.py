@@ -0,0 +1,34 @@
+import sys
+
+import pytest
+
+import cli
+from papers_fetcher.fetcher import PaperFetchError, PaperInfo
+
+PAPER = PaperInfo(
+    pubmed_id="1",
+    title="Paper 1",
+    publication_date="2024",
+    non_academic_authors=["Jane Smith"],
+    company_affiliations=["Pfizer Inc., New York"],
+    corresponding_email="jane@pfizer.com",
+)
+
+
+def test_failed_fetch_exits_non_zero(tmp_path, monkeypatch, capsys):
+    def failing_details(pubmed_ids, debug=False, email=None):
+        yield PAPER
+        raise PaperFetchError("Error fetching paper details: connection reset")
+
+    output = tmp_path / "papers.csv"
+    monkeypatch.setattr(cli, "fetch_pubmed_ids", lambda query, debug=False, email=None: ["1", "2"])
+    monkeypatch.setattr(cli, "iter_paper_details", failing_details)
+    monkeypatch.setattr(sys, "argv", ["get-papers-list", "cancer", "-e", "me@example.org", "-f", str(output)])
+
+    with pytest.raises(SystemExit) as excinfo:
+        cli.main()
+
+    assert excinfo.value.code == 1
+    captured = capsys.readouterr()
+    assert "successfully saved" not in captured.out
+    assert "connection reset" in captured.err
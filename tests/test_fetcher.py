@@ -0,0 +1,173 @@
+import gzip
+import io
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPConnectionPool, HTTPResponse
+from urllib3.exceptions import ProtocolError
+
+import papers_fetcher.fetcher as fetcher
+
+ARTICLE = (
+    b"<PubmedArticle><MedlineCitation><PMID>%d</PMID><Article>"
+    b"<ArticleTitle>Paper %d</ArticleTitle>"
+    b"<Journal><JournalIssue><PubDate><Year>2024</Year></PubDate></JournalIssue></Journal>"
+    b"<AuthorList><Author><LastName>Smith</LastName><ForeName>Jane</ForeName>"
+    b"<AffiliationInfo><Affiliation>Pfizer Inc., New York. jane@pfizer.com</Affiliation></AffiliationInfo>"
+    b"</Author></AuthorList>"
+    b"</Article></MedlineCitation></PubmedArticle>"
+)
+PAPER_COUNT = 400
+
+
+def _efetch_xml(count: int) -> bytes:
+    articles = b"".join(ARTICLE % (pmid, pmid) for pmid in range(1, count + 1))
+    return b'<?xml version="1.0"?><PubmedArticleSet>' + articles + b"</PubmedArticleSet>"
+
+
+@pytest.fixture
+def plain_session(monkeypatch):
+    session = fetcher._configure_session(requests.Session())
+    monkeypatch.setattr(fetcher, "_SESSION", session)
+    return session
+
+
+@pytest.fixture
+def cached_session(monkeypatch):
+    # In-memory CachedSession wired up like the module's own session; requests-cache is an optional extra
+    requests_cache = pytest.importorskip("requests_cache")
+    session = requests_cache.CachedSession(backend="memory", allowable_methods=("GET", "POST"))
+    session.mount("https://", fetcher._RateLimitedAdapter())
+    monkeypatch.setattr(fetcher, "_SESSION", session)
+    return session
+
+
+@pytest.fixture
+def gzip_efetch(monkeypatch):
+    # Serve ESearch with a history handle and EFetch with a gzip-encoded body that urllib3 has to decode
+    efetch_body = gzip.compress(_efetch_xml(PAPER_COUNT))
+    esearch_body = gzip.compress(json.dumps(
+        {"esearchresult": {"webenv": "WEBENV_1", "querykey": "1", "count": str(PAPER_COUNT)}}
+    ).encode())
+    calls = []
+
+    def fake_send(self, request, **kwargs):
+        calls.append(request)
+        if request.url.startswith(fetcher.PUBMED_ESEARCH_URL):
+            body, content_type = esearch_body, "application/json"
+        else:
+            body, content_type = efetch_body, "text/xml"
+        raw = HTTPResponse(
+            body=io.BytesIO(body),
+            headers={"Content-Encoding": "gzip", "Content-Type": content_type},
+            status=200,
+            preload_content=False,
+            decode_content=False,
+            request_url=request.url,
+        )
+        return self.build_response(request, raw)
+
+    monkeypatch.setattr(HTTPAdapter, "send", fake_send)
+    return calls
+
+
+def test_gzip_efetch_through_cached_session(cached_session, gzip_efetch):
+    # Cold cache: the body is copied into the cache before parsing and must still parse in full
+    papers = fetcher.fetch_and_parse_paper_details(["1"])
+    assert len(papers) == PAPER_COUNT
+    assert papers[0].pubmed_id == "1"
+    assert papers[0].company_affiliations == ["Pfizer Inc., New York. jane@pfizer.com"]
+
+    # Warm cache: served without reaching the adapter
+    assert len(fetcher.fetch_and_parse_paper_details(["1"])) == PAPER_COUNT
+    assert len(gzip_efetch) == 1
+
+
+def test_history_fetch_bypasses_cached_session(cached_session, gzip_efetch):
+    history = fetcher.search_pubmed_history("cancer")
+    assert history == fetcher.SearchHistory(webenv="WEBENV_1", query_key="1", count=PAPER_COUNT)
+
+    papers = list(fetcher.iter_paper_details_from_history(history, chunk_size=PAPER_COUNT))
+    assert len(papers) == PAPER_COUNT
+
+    # Nothing tied to the WebEnv ends up in the response cache
+    assert len(gzip_efetch) == 2
+    assert not list(cached_session.cache.responses.keys())
+
+
+def test_failed_chunk_raises_instead_of_truncating(plain_session, gzip_efetch, monkeypatch):
+    # Let the first chunk through and fail the second one
+    send = HTTPAdapter.send
+
+    def flaky_send(self, request, **kwargs):
+        if "id=201%2C" in (request.body or ""):
+            raise requests.exceptions.ConnectionError("connection reset")
+        return send(self, request, **kwargs)
+
+    monkeypatch.setattr(HTTPAdapter, "send", flaky_send)
+    pubmed_ids = [str(pmid) for pmid in range(1, 401)]
+
+    papers = fetcher.iter_paper_details(pubmed_ids, chunk_size=200)
+    assert len([next(papers) for _ in range(PAPER_COUNT)]) == PAPER_COUNT
+    with pytest.raises(fetcher.PaperFetchError, match=r"PubMed IDs 201\.\.400 \(200 IDs\): connection reset"):
+        next(papers)
+
+    # The eager wrapper returns nothing rather than a partial list
+    assert fetcher.fetch_and_parse_paper_details(pubmed_ids, chunk_size=200) == []
+
+
+def test_retries_wait_on_the_rate_limiter(monkeypatch):
+    # Fail the first two attempts below the adapter so urllib3's own retry loop re-sends the request
+    attempts = []
+
+    def flaky_make_request(self, conn, method, url, **kwargs):
+        attempts.append(url)
+        if len(attempts) < 3:
+            raise ProtocolError("connection reset")
+        return HTTPResponse(body=io.BytesIO(b"{}"), status=200, preload_content=False, request_url=url)
+
+    monkeypatch.setattr(HTTPConnectionPool, "_make_request", flaky_make_request)
+    acquired = []
+    monkeypatch.setattr(fetcher._RATE_LIMITER, "acquire", lambda: acquired.append(True))
+
+    session = requests.Session()
+    session.mount("https://", fetcher._RateLimitedAdapter(max_retries=fetcher._RateLimitedRetry(total=3)))
+    assert session.get(fetcher.PUBMED_ESEARCH_URL).status_code == 200
+
+    assert len(attempts) == 3
+    assert len(acquired) == 3
+
+
+def test_import_does_not_create_cache_file(tmp_path):
+    # The on-disk cache lives under the user cache directory and is only opened on first use
+    subprocess.run([sys.executable, "-c", "import papers_fetcher.fetcher"], cwd=tmp_path, check=True,
+                   env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)})
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize("affiliation, expected", [
+    ("Pfizer Inc., New York", True),
+    ("Bayer AG, Berlin, Germany", True),
+    ("Regeneron Pharmaceuticals, Tarrytown, NY", True),
+    ("Department of Oncology, University of Alabama, Birmingham, Alabama", False),
+    ("Novartis Institutes for BioMedical Research, Cambridge, MA", False),
+    # Short keywords no longer match inside longer words
+    ("Agency for Healthcare Research and Quality, Rockville, MD", False),  # "ag" in "agency"
+    ("Whole Genome Solutions, San Diego", True),  # "who" in "whole"
+    ("Huntsville, Alabama", False),
+    # Company stems still match inside compound words and non-English endings
+    ("AbbVie Biopharmaceuticals, North Chicago, IL", True),
+    ("Illumina Biotechnologies, San Diego, CA", True),
+    ("BioPharma Consulting Ltd, London", True),
+    ("Janssen Pharmaceutica NV, Beerse, Belgium", True),
+    ("Immunotherapeutics Inc, Boston", True),
+    ("Diagnostica Stago, Asnieres, France", True),
+    ("Department of Pharmacology, University of Oxford", False),
+])
+def test_is_corporate_affiliation(affiliation, expected):
+    assert fetcher.is_corporate_affiliation(affiliation) is expected